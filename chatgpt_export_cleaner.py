@@ -13,14 +13,44 @@ Usage:
 """
 
 import argparse
+import codecs
 import json
 import logging
+import mmap
+import os
 import re
+import shutil
+import sys
+import tempfile
 import unicodedata
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator, Optional
 
 from tqdm import tqdm
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; without it the export is loaded in one go
+    ijson = None
+
+# Parse errors that can surface while a streamed export is being consumed
+_STREAM_ERRORS = (ijson.JSONError,) if ijson is not None else ()
+
+# Errors json_dumps raises for unserializable text such as lone surrogates
+# (orjson.JSONEncodeError is TypeError itself, so it is only caught right
+# around the json_dumps calls)
+_ENCODE_ERRORS = (
+    (UnicodeEncodeError, orjson.JSONEncodeError) if orjson is not None else (UnicodeEncodeError,)
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -35,7 +65,166 @@ EMOJIS = {
     "success": "✅"
 }
 
-def clean_text(s: str) -> str:
+# Conversation fields read by process_conversation
+_WORKER_FIELDS = ("title", "current_node", "mapping")
+
+# process_conversation output: (title, Markdown text, JSON record bytes,
+# pairs JSONL bytes, number of pairs)
+ConversationResult = tuple[str, str, bytes, bytes, int]
+
+# Interned role values: every extracted message shares these two objects,
+# so role comparisons resolve on the identity fast path of str equality
+_USER = sys.intern("user")
+_ASSISTANT = sys.intern("assistant")
+_ROLE_LABEL = {_USER: EMOJIS["user"], _ASSISTANT: EMOJIS["assistant"]}
+
+_normalize = unicodedata.normalize
+
+# Precompiled text cleanup patterns
+_TRAILING_QUOTES = re.compile(r'""+$')
+_MULTI_NL = re.compile(r"\n{3,}")
+_UNSAFE_FN = re.compile(r"[^\w\-. ]+")
+
+class SerializationError(ValueError):
+    """Raised when a conversation's JSON outputs can't be serialized."""
+
+
+def json_loads(raw: Any) -> Any:
+    """
+    Parse a JSON document from raw bytes.
+    
+    Uses orjson when available, otherwise the stdlib json module. Invalid
+    UTF-8 sequences are dropped rather than treated as a parse error, and
+    input that only the stdlib parser accepts (lone surrogate escapes,
+    NaN/Infinity) is still parsed.
+    
+    Args:
+        raw: UTF-8 encoded JSON document (bytes or memoryview)
+    
+    Returns:
+        Parsed Python object
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # Rare in practice; let the more lenient stdlib parser decide
+    return json.loads(str(raw, "utf-8", errors="ignore"))
+
+
+def load_json_file(path: Path) -> Any:
+    """
+    Parse a JSON file through a read-only memory map.
+    
+    The parser reads straight from the mapped pages, so the file contents
+    are never copied into an intermediate bytes object.
+    
+    Args:
+        path: Path to the JSON file
+    
+    Returns:
+        Parsed Python object
+    """
+    with path.open("rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return json_loads(b"")  # Empty files can't be mapped; let the parser report it
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as buf:
+            return json_loads(buf)
+
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON bytes.
+    
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with a 2-space indent
+    
+    Returns:
+        UTF-8 encoded JSON (non-ASCII characters are kept as-is)
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    # Compact separators, so the output matches orjson byte for byte
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class LossyUTF8Reader:
+    """
+    Binary file wrapper that drops invalid UTF-8 sequences on read.
+    
+    Gives the streaming parser the same tolerance as decoding the whole
+    file with errors="ignore", while still handing it bytes.
+    """
+
+    def __init__(self, fh: BinaryIO) -> None:
+        self._fh = fh
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+
+    def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            return b""
+        while True:
+            chunk = self._fh.read(size)
+            text = self._decoder.decode(chunk, final=not chunk)
+            # An empty result only means EOF once the underlying file is exhausted
+            if text or not chunk:
+                return text.encode("utf-8")
+
+
+def find_conversations_prefix(path: Path) -> Optional[str]:
+    """
+    Locate the conversations array of an export without loading it.
+    
+    Scans parse events only until the array is found, which for OpenAI
+    exports happens within the first few bytes.
+    
+    Args:
+        path: Path to the OpenAI conversations.json export
+    
+    Returns:
+        ijson prefix of the array items ('item' for a top-level list,
+        'conversations.item' for {"conversations": [...]}), or None if the
+        export has neither shape
+    
+    Raises:
+        ijson.JSONError: If the file is not valid JSON up to that point
+    """
+    with path.open("rb") as fh:
+        for prefix, event, _ in ijson.parse(LossyUTF8Reader(fh)):
+            if prefix == "conversations":
+                # First event of the top-level "conversations" value
+                return "conversations.item" if event == "start_array" else None
+            if prefix == "":
+                if event == "start_array":
+                    return "item"
+                if event not in ("start_map", "map_key", "end_map"):
+                    return None  # Top-level scalar
+    return None
+
+
+def stream_conversations(path: Path, prefix: str) -> Iterator[dict]:
+    """
+    Lazily parse conversations from an export, one at a time.
+    
+    Only the conversation currently being yielded is held in memory, so
+    large exports don't have to be loaded whole.
+    
+    Args:
+        path: Path to the OpenAI conversations.json export
+        prefix: ijson prefix of the conversations array items
+    
+    Yields:
+        Conversation dicts, in file order
+    """
+    with path.open("rb") as fh:
+        yield from ijson.items(LossyUTF8Reader(fh), prefix, use_float=True)
+
+def clean_text(s: Optional[str]) -> str:
     """
     Clean and normalize raw text content.
     
@@ -56,16 +245,53 @@ def clean_text(s: str) -> str:
     if s is None:
         return ""
     
-    s = unicodedata.normalize("NFKC", s)
+    # NFKC is a no-op on pure ASCII, which covers most messages
+    if not s.isascii():
+        s = _normalize("NFKC", s)  # Also folds non-breaking spaces to spaces
+    # Each replace is a fast C scan that returns the string unchanged when its
+    # target is absent, which is cheaper than one regex pass with a callback
     s = s.replace("\r\n", "\n").replace("\r", "\n")  # Normalize line endings
     s = s.replace("\t•", "•").replace("\t", "    ")  # Standardize tabs and bullets
-    s = s.replace("•\t", "• ").replace("•  ", "• ")
-    s = s.replace("\u00A0", " ")  # Non-breaking space → regular space
-    s = re.sub(r'""+$', '"', s.strip())  # Remove trailing quote repetition
-    s = re.sub(r"\n{3,}", "\n\n", s)  # Cap consecutive newlines at 2
+    s = s.replace("•  ", "• ")  # Standardize bullet spacing
+    s = _TRAILING_QUOTES.sub('"', s.strip())  # Remove trailing quote repetition
+    s = _MULTI_NL.sub("\n\n", s)  # Cap consecutive newlines at 2
     return s.strip()
 
-def extract_messages_from_mapping(conv: dict) -> list[dict]:
+def iter_current_branch(mapping: dict, current_node: Optional[str]) -> Iterator[dict]:
+    """
+    Yield the nodes of the active conversation branch, root first.
+    
+    Walks parent pointers up from current_node, recording for each node the
+    child that lies on the path, then replays that path forwards. Stops at
+    missing nodes and breaks parent cycles.
+    
+    Args:
+        mapping: Conversation 'mapping' dict (node id → node)
+        current_node: Id of the last node of the active branch
+    
+    Yields:
+        Mapping nodes from the root down to current_node
+    """
+    child_on_path: dict = {}
+    current = current_node
+    child = None
+
+    # Traverse linked list backwards from current node to root
+    node = mapping.get(current) if current else None
+    while node is not None and current not in child_on_path:
+        child_on_path[current] = child
+        child = current
+        current = node.get("parent")
+        node = mapping.get(current) if current else None
+
+    # `child` is now the root of the branch; walk it forwards
+    node_id = child
+    while node_id is not None:
+        yield mapping[node_id]
+        node_id = child_on_path[node_id]
+
+
+def extract_messages_from_mapping(conv: dict) -> list[tuple[str, str]]:
     """
     Extract and order messages from ChatGPT conversation structure.
     
@@ -77,68 +303,63 @@ def extract_messages_from_mapping(conv: dict) -> list[dict]:
         conv: Conversation dict from OpenAI export with 'mapping' and 'current_node'
     
     Returns:
-        List of ordered dicts with 'role' (user/assistant) and 'text' fields.
+        List of ordered (role, text) tuples, role being 'user' or 'assistant'.
         Empty if no valid messages found.
     """
     mapping = conv.get("mapping", {})
-    current = conv.get("current_node")
-    ordered_nodes = []
-    seen = set()
-
-    # Traverse linked list backwards from current node to root
-    while current and current in mapping and current not in seen:
-        seen.add(current)
-        node = mapping[current]
-        ordered_nodes.append(node)
-        current = node.get("parent")
-
-    ordered_nodes.reverse()
     msgs = []
 
-    for node in ordered_nodes:
+    for node in iter_current_branch(mapping, conv.get("current_node")):
         m = node.get("message")
         if not m:
             continue
         
         # Normalize role names
-        author = (m.get("author") or {}).get("role", "")
+        author_obj = m.get("author")
+        author = author_obj.get("role", "") if author_obj else ""
         if author in ("tool", "ChatGPT"):
             author = "assistant"
         
         # Skip system messages unless user-authored
-        if author == "system" and not (m.get("metadata") or {}).get("is_user_system_message"):
-            continue
+        if author == "system":
+            metadata = m.get("metadata")
+            if not (metadata and metadata.get("is_user_system_message")):
+                continue
 
-        content = m.get("content") or {}
-        ctype = content.get("content_type")
+        content = m.get("content")
         
         # Only process text content
-        if ctype not in ("text", "multimodal_text"):
+        if not content or content.get("content_type") not in ("text", "multimodal_text"):
             continue
 
         parts = content.get("parts") or []
-        chunks = []
-
-        # Extract text from parts (handles string and dict formats)
-        for p in parts:
-            if isinstance(p, str) and p.strip():
-                chunks.append(p)
-            elif isinstance(p, dict):
-                if p.get("text"):
-                    chunks.append(p["text"])
-                elif p.get("content_type") == "audio_transcription" and p.get("text"):
-                    chunks.append(p["text"])
-
-        text = clean_text("\n".join(chunks))
+
+        if len(parts) == 1 and type(parts[0]) is str:
+            # Fast path for the common single plain-text part
+            text = clean_text(parts[0])
+        else:
+            chunks = []
+
+            # Extract text from parts (handles string and dict formats)
+            for p in parts:
+                if isinstance(p, str) and p.strip():
+                    chunks.append(p)
+                elif isinstance(p, dict):
+                    if p.get("text"):
+                        chunks.append(p["text"])
+                    elif p.get("content_type") == "audio_transcription" and p.get("text"):
+                        chunks.append(p["text"])
+
+            text = clean_text("\n".join(chunks))
         if not text:
             continue
 
-        role = "assistant" if author == "assistant" else "user"
-        msgs.append({"role": role, "text": text})
+        role = _ASSISTANT if author == "assistant" else _USER
+        msgs.append((role, text))
     
     return msgs
 
-def messages_to_pairs(messages: list[dict]) -> list[dict]:
+def messages_to_pairs(messages: list[tuple[str, str]]) -> list[dict]:
     """
     Convert messages into prompt-completion pairs for fine-tuning.
     
@@ -146,7 +367,7 @@ def messages_to_pairs(messages: list[dict]) -> list[dict]:
     next assistant response. Trailing user messages without a response are discarded.
     
     Args:
-        messages: List of message dicts with 'role' and 'text' fields
+        messages: List of (role, text) message tuples
     
     Returns:
         List of dicts with 'prompt' and 'completion' fields (already cleaned)
@@ -154,15 +375,15 @@ def messages_to_pairs(messages: list[dict]) -> list[dict]:
     pairs = []
     buffer_user = []
 
-    for m in messages:
-        if m["role"] == "user":
-            if m["text"]:
-                buffer_user.append(m["text"])
+    for role, text in messages:
+        if role == _USER:
+            if text:
+                buffer_user.append(text)
         else:
             # Found assistant message, pair with buffered user messages
-            if buffer_user and m["text"]:
+            if buffer_user and text:
                 prompt = "\n\n".join(buffer_user)
-                completion = m["text"]
+                completion = text
                 # Verify both parts have content after cleaning
                 if prompt and completion:
                     pairs.append({"prompt": prompt, "completion": completion})
@@ -185,11 +406,155 @@ def sanitize_filename(title: str, max_length: int = 120) -> str:
     Returns:
         Safe filename string (defaults to 'conversation' if invalid)
     """
-    safe = re.sub(r"[^\w\-. ]+", "_", title)[:max_length].strip()
+    safe = _UNSAFE_FN.sub("_", title)[:max_length].strip()
     return safe if safe else "conversation"
 
 
-def main():
+def write_file(path: str, data: bytes) -> None:
+    """
+    Write bytes to a file, creating or truncating it.
+    
+    Uses unbuffered os-level calls: for a payload that is already fully
+    encoded, file objects would only add buffering and wrapper overhead.
+    
+    Args:
+        path: Destination file path
+        data: Bytes to write
+    """
+    # O_BINARY only exists (and matters) on Windows
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o666)  # Same default mode as open(), filtered by the umask
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]  # os.write may write partially
+    finally:
+        os.close(fd)
+
+
+def publish_staged_outputs(staging_dir: Path, outdir: Path, md_dir: Path) -> None:
+    """
+    Move the outputs of a finished run into their final locations.
+    
+    Files of the same name from earlier runs are replaced; other existing
+    Markdown files are left alone.
+    
+    Args:
+        staging_dir: Staging directory the run wrote into
+        outdir: Output folder
+        md_dir: Final Markdown folder
+    """
+    with os.scandir(staging_dir / "markdown") as entries:
+        for entry in entries:
+            os.replace(entry.path, os.path.join(md_dir, entry.name))
+    for name in ("all_conversations.json", "pairs.jsonl"):
+        os.replace(staging_dir / name, outdir / name)
+
+
+def process_conversation(conv: dict, indent: bool = False) -> Optional[ConversationResult]:
+    """
+    Convert one raw conversation into its Markdown, JSON and JSONL outputs.
+    
+    Pure function of its input (no filesystem I/O), so it can run in a
+    worker process; writing results to disk is left to the caller.
+    
+    Args:
+        conv: Conversation dict from OpenAI export
+        indent: Pretty-print the JSON record, indented as an element of
+            the top-level all_conversations.json array
+    
+    Returns:
+        Tuple of (title, Markdown text, JSON bytes of the conversation
+        record, JSONL bytes of prompt-completion pairs, number of pairs), or
+        None if the conversation has no usable messages
+    
+    Raises:
+        SerializationError: If the conversation's text can't be encoded as JSON
+    """
+    title = conv.get("title") or "Conversation"
+    messages = extract_messages_from_mapping(conv)
+    
+    if not messages:
+        return None
+
+    # Markdown version of the conversation (encoded by the caller, so that
+    # unencodable text only fails that conversation's file)
+    markdown = f"# {title}\n\n" + "\n".join(
+        f"**{_ROLE_LABEL[role]}**:\n\n{text}\n"
+        for role, text in messages
+    )
+
+    # Prompt-completion pairs for fine-tuning
+    pairs = messages_to_pairs(messages)
+    for p in pairs:
+        p["_title"] = title
+    try:
+        pairs_jsonl = b"".join(json_dumps(p) + b"\n" for p in pairs)
+        record = json_dumps({
+            "title": title,
+            "messages": [{"role": role, "text": text} for role, text in messages],
+        }, indent=indent)
+    except _ENCODE_ERRORS as e:
+        raise SerializationError(f"cannot serialize conversation '{title}': {e}") from e
+    if indent:
+        # Nest one level deeper; raw newlines never occur inside JSON strings
+        record = record.replace(b"\n", b"\n  ")
+    return title, markdown, record, pairs_jsonl, len(pairs)
+
+
+def default_workers() -> int:
+    """Number of CPUs this process may run on, honouring its affinity mask."""
+    if hasattr(os, "sched_getaffinity"):  # Not available on macOS and Windows
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def process_batch(convs: list[dict], indent: bool = False) -> list[Optional[ConversationResult]]:
+    """Run process_conversation over a batch of conversations (one worker task)."""
+    return [process_conversation(conv, indent) for conv in convs]
+
+
+def iter_processed(
+    conversations: Iterable[dict], workers: int, indent: bool = False, batch_size: int = 32
+) -> Iterator[Optional[ConversationResult]]:
+    """
+    Run process_conversation over all conversations, preserving input order.
+    
+    Conversations are pulled from the input lazily and handed to workers in
+    batches, with only a few batches in flight at once, so a streamed input
+    is never read far ahead of the results being consumed.
+    
+    Args:
+        conversations: Iterable of raw conversation dicts
+        workers: Number of worker processes (1 processes in-line)
+        indent: Passed through to process_conversation
+        batch_size: Conversations sent to a worker per task
+    
+    Yields:
+        process_conversation results, in the same order as the input
+    """
+    if workers <= 1:
+        for conv in conversations:
+            yield process_conversation(conv, indent)
+        return
+
+    # Workers only get the fields process_conversation reads, which keeps
+    # the other export metadata out of the pickled task payloads
+    it = (
+        {key: conv[key] for key in _WORKER_FIELDS if key in conv}
+        for conv in conversations
+    )
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[Future] = deque()
+        for batch in iter(lambda: list(islice(it, batch_size)), []):
+            pending.append(executor.submit(process_batch, batch, indent))
+            if len(pending) > 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main() -> None:
     """Parse command-line arguments and orchestrate the export cleaning process."""
     parser = argparse.ArgumentParser(
         description="Parse and clean OpenAI ChatGPT data exports into structured formats"
@@ -206,6 +571,20 @@ def main():
         required=True,
         help="Output folder for cleaned exports"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="Number of worker processes used to parse conversations "
+             "(default: number of CPUs available to the process)"
+    )
+    parser.add_argument(
+        "--compact",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Write all_conversations.json without indentation (default); "
+             "use --no-compact for a pretty-printed file"
+    )
     args = parser.parse_args()
 
     outdir = Path(args.outdir)
@@ -213,15 +592,19 @@ def main():
     md_dir = outdir / "markdown_by_conversation"
     md_dir.mkdir(exist_ok=True)
 
-    # Load and parse input JSON
+    # Load input JSON: stream it when ijson is available, else parse it whole
+    streaming = ijson is not None
     try:
         input_file = Path(args.inp)
         if not input_file.exists():
             logger.error(f"Input file not found: {args.inp}")
             return
         
-        data = json.loads(input_file.read_text(encoding="utf-8", errors="ignore"))
-    except json.JSONDecodeError as e:
+        if streaming:
+            prefix = find_conversations_prefix(input_file)
+        else:
+            data = load_json_file(input_file)
+    except (json.JSONDecodeError, *_STREAM_ERRORS) as e:
         logger.error(f"Failed to parse JSON: {e}")
         return
     except Exception as e:
@@ -229,66 +612,89 @@ def main():
         return
 
     # Handle both OpenAI formats: dict with "conversations" key or direct list
-    if isinstance(data, dict) and "conversations" in data:
+    conversations: Optional[Iterable[dict]] = None
+    if streaming:
+        if prefix is not None:
+            conversations = stream_conversations(input_file, prefix)
+    elif isinstance(data, dict) and "conversations" in data:
         conversations = data["conversations"]
     elif isinstance(data, list):
         conversations = data
-    else:
+
+    if conversations is None:
         logger.error("Invalid format: expected {'conversations': [...]} or [...]")
         return
 
-    all_convos = []
-    all_pairs = []
+    indent = not args.compact
+    convos_count = 0
+    pairs_count = 0
     skipped = 0
 
-    for conv in tqdm(conversations, desc="Parsing conversations"):
-        title = conv.get("title") or "Conversation"
-        messages = extract_messages_from_mapping(conv)
-        
-        if not messages:
-            skipped += 1
-            continue
-
-        # Save Markdown version of each conversation
-        md_lines = [f"# {title}\n"]
-        for m in messages:
-            role_label = EMOJIS["user"] if m["role"] == "user" else EMOJIS["assistant"]
-            md_lines.append(f"**{role_label}**:\n\n{m['text']}\n")
-        
-        safe_title = sanitize_filename(title)
-        md_file = md_dir / f"{safe_title}.md"
-        
-        try:
-            md_file.write_text("\n".join(md_lines), encoding="utf-8")
-        except Exception as e:
-            logger.warning(f"Failed to write markdown for '{title}': {e}")
-
-        all_convos.append({"title": title, "messages": messages})
-
-        # Generate prompt-completion pairs for fine-tuning
-        pairs = messages_to_pairs(messages)
-        for p in pairs:
-            p["_title"] = title
-        all_pairs.extend(pairs)
-
-    # Output all structured data
+    # Outputs are written to a staging directory inside outdir and only moved
+    # into place once the whole export has been processed, so a failed run
+    # (e.g. a truncated input) leaves earlier output untouched
+    staging_dir: Optional[Path] = None
     try:
-        (outdir / "all_conversations.json").write_text(
-            json.dumps(all_convos, ensure_ascii=False, indent=2), encoding="utf-8"
-        )
-
-        with (outdir / "pairs.jsonl").open("w", encoding="utf-8") as f:
-            for p in all_pairs:
-                f.write(json.dumps(p, ensure_ascii=False) + "\n")
-    except Exception as e:
+        staging_dir = Path(tempfile.mkdtemp(prefix=".staging-", dir=outdir))
+        staging_md_dir = staging_dir / "markdown"
+        staging_md_dir.mkdir()
+        md_prefix = os.fspath(staging_md_dir) + os.sep  # Plain string paths for the per-conversation files
+
+        # Outputs are streamed to disk as they are produced instead of kept in memory
+        with (staging_dir / "pairs.jsonl").open("wb", buffering=1 << 20) as pairs_fp, \
+                (staging_dir / "all_conversations.json").open("wb", buffering=1 << 20) as convos_fp:
+            # all_conversations.json is a JSON array, written one element at a time
+            # (same layout as json.dumps(..., indent=2) when indenting)
+            array_start, item_sep, array_end = (
+                (b"[\n  ", b",\n  ", b"\n]") if indent else (b"[", b",", b"]")
+            )
+
+            results = iter_processed(conversations, args.workers, indent)
+            total = len(conversations) if isinstance(conversations, list) else None
+            # disable=None turns the progress bar off when stderr is not a TTY
+            progress = tqdm(results, total=total, desc="Parsing conversations", disable=None)
+            for result in progress:
+                if result is None:
+                    skipped += 1
+                    continue
+
+                title, markdown, record, pairs_jsonl, n_pairs = result
+
+                # Save Markdown version of each conversation
+                md_path = md_prefix + sanitize_filename(title) + ".md"
+                
+                try:
+                    write_file(md_path, markdown.encode("utf-8"))
+                except Exception as e:
+                    logger.warning(f"Failed to write markdown for '{title}': {e}")
+
+                convos_fp.write(item_sep if convos_count else array_start)
+                convos_fp.write(record)
+                convos_count += 1
+
+                pairs_fp.write(pairs_jsonl)
+                pairs_count += n_pairs
+
+            convos_fp.write(array_end if convos_count else b"[]")
+
+        publish_staged_outputs(staging_dir, outdir, md_dir)
+    except _STREAM_ERRORS as e:
+        logger.error(f"Failed to parse JSON: {e}")
+        return
+    except (OSError, SerializationError) as e:
+        # Only write and serialization failures; other errors raised while
+        # processing conversations are bugs and keep their traceback
         logger.error(f"Failed to write output files: {e}")
         return
+    finally:
+        if staging_dir is not None:
+            shutil.rmtree(staging_dir, ignore_errors=True)
 
     # Summary report
     logger.info(
         f"✅ Export completed!\n"
-        f"  • Conversations: {len(all_convos)}\n"
-        f"  • Prompt-completion pairs: {len(all_pairs)}\n"
+        f"  • Conversations: {convos_count}\n"
+        f"  • Prompt-completion pairs: {pairs_count}\n"
         f"  • Skipped (empty): {skipped}\n"
         f"  • Output: {outdir}"
     )
@@ -0,0 +1,32 @@
+"""Tests for clean_text."""
+
+import unittest
+
+from chatgpt_export_cleaner import clean_text
+
+
+class CleanTextTests(unittest.TestCase):
+    def test_none_and_empty(self):
+        self.assertEqual(clean_text(None), "")
+        self.assertEqual(clean_text("  \n\n "), "")
+
+    def test_line_endings(self):
+        self.assertEqual(clean_text("a\r\nb\rc"), "a\nb\nc")
+
+    def test_tabs_and_bullets(self):
+        self.assertEqual(clean_text("\t• item\n\tcode"), "• item\n    code")
+        self.assertEqual(clean_text("x\n•  item"), "x\n• item")
+
+    def test_nfkc(self):
+        self.assertEqual(clean_text("e\u0301 \ufb01\u00a0x"), "\u00e9 fi x")
+
+    def test_trailing_quotes(self):
+        self.assertEqual(clean_text('done"""  '), 'done"')
+        self.assertEqual(clean_text('say ""hi"" now'), 'say ""hi"" now')
+
+    def test_newline_runs_are_capped(self):
+        self.assertEqual(clean_text("a\n\n\n\n\nb\r\n\r\n\r\nc"), "a\n\nb\n\nc")
+
+
+if __name__ == "__main__":
+    unittest.main()
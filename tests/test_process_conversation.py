@@ -0,0 +1,46 @@
+"""Tests for process_conversation."""
+
+import json
+import unittest
+
+from chatgpt_export_cleaner import process_conversation
+
+
+def make_conversation(title, messages):
+    """Build a linear export conversation from (role, text) tuples."""
+    mapping = {}
+    parent = None
+    for i, (role, text) in enumerate(messages):
+        node_id = f"n{i}"
+        mapping[node_id] = {
+            "parent": parent,
+            "message": {
+                "author": {"role": role},
+                "content": {"content_type": "text", "parts": [text]},
+            },
+        }
+        parent = node_id
+    return {"title": title, "current_node": parent, "mapping": mapping}
+
+
+class IndentedRecordTests(unittest.TestCase):
+    def test_nested_record_matches_json_dumps(self):
+        convs = [
+            make_conversation("Caf\u00e9 \U0001f600", [
+                ("user", "line one\nline two\t\"quoted\""),
+                ("assistant", "\u2022 item\n\nback\\slash </tag>"),
+            ]),
+            make_conversation("Second", [("user", "{\"a\": [1, 2]}")]),
+        ]
+        written = b"[\n  " + b",\n  ".join(
+            process_conversation(conv, indent=True)[2] for conv in convs
+        ) + b"\n]"
+
+        # The same records, re-parsed from compact output and indented as a whole
+        records = [json.loads(process_conversation(conv)[2]) for conv in convs]
+        expected = json.dumps(records, ensure_ascii=False, indent=2).encode("utf-8")
+        self.assertEqual(written, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Tests for the streaming input helpers."""
+
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from chatgpt_export_cleaner import LossyUTF8Reader, find_conversations_prefix, ijson
+
+
+class LossyUTF8ReaderTests(unittest.TestCase):
+    def read_all(self, data, size):
+        reader = LossyUTF8Reader(io.BytesIO(data))
+        chunks = []
+        while True:
+            chunk = reader.read(size)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def test_multibyte_characters_split_across_reads(self):
+        data = "a\u00e9\u20ac\U0001f600b".encode("utf-8")
+        for size in (1, 2, 3, 5, -1):
+            self.assertEqual(self.read_all(data, size), data, size)
+
+    def test_invalid_sequences_are_dropped(self):
+        data = b"a\xffb\xe2\x82c\xf0\x9f\x98"  # Stray byte, truncated sequences
+        for size in (1, 4, -1):
+            self.assertEqual(self.read_all(data, size), b"abc", size)
+
+    def test_zero_size_read(self):
+        self.assertEqual(LossyUTF8Reader(io.BytesIO(b"abc")).read(0), b"")
+
+
+@unittest.skipIf(ijson is None, "ijson is not installed")
+class FindConversationsPrefixTests(unittest.TestCase):
+    def prefix_of(self, text):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        try:
+            os.write(fd, text.encode("utf-8"))
+            os.close(fd)
+            return find_conversations_prefix(Path(path))
+        finally:
+            os.remove(path)
+
+    def test_top_level_list(self):
+        self.assertEqual(self.prefix_of('[{"title": "a"}]'), "item")
+        self.assertEqual(self.prefix_of("[]"), "item")
+
+    def test_conversations_key(self):
+        self.assertEqual(self.prefix_of('{"conversations": []}'), "conversations.item")
+        self.assertEqual(
+            self.prefix_of('{"user": {"conversations": 1}, "conversations": [{}]}'),
+            "conversations.item",
+        )
+
+    def test_other_shapes(self):
+        self.assertIsNone(self.prefix_of('{"foo": [{}]}'))
+        self.assertIsNone(self.prefix_of('{"conversations": {"a": 1}}'))
+        self.assertIsNone(self.prefix_of('{"title": "a", "mapping": {}}'))
+        self.assertIsNone(self.prefix_of('"text"'))
+        self.assertIsNone(self.prefix_of("42"))
+
+    def test_empty_file(self):
+        with self.assertRaises(ijson.JSONError):
+            self.prefix_of("")
+
+
+if __name__ == "__main__":
+    unittest.main()